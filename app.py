@@ -10,15 +10,27 @@ Mythic Art Explorer — Advanced UI (Modal + Prev/Next)
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from io import BytesIO
 from PIL import Image, UnidentifiedImageError
 import os
+import json
+import logging
+import sqlite3
+import hashlib
 import math
+import re
+import importlib.util
 import time
+import threading
+import types
 import collections
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Tuple
 
 # Optional libraries
 try:
@@ -28,11 +40,28 @@ except Exception:
     HAS_NETWORKX = False
 
 try:
-    import openai
-    HAS_OPENAI = True
+    import diskcache
+    HAS_DISKCACHE = True
 except Exception:
-    openai = None
-    HAS_OPENAI = False
+    diskcache = None
+    HAS_DISKCACHE = False
+
+try:
+    import orjson
+    json_loads = orjson.loads  # C parser; noticeably faster on large MET search payloads
+except Exception:
+    orjson = None
+    json_loads = json.loads
+
+try:
+    import simplejpeg  # libjpeg-turbo bindings; faster JPEG decode than Pillow
+    HAS_SIMPLEJPEG = True
+except Exception:
+    simplejpeg = None
+    HAS_SIMPLEJPEG = False
+
+# openai is imported on first use (see _build_openai_client); pages without AI never pay for it
+HAS_OPENAI = importlib.util.find_spec("openai") is not None
 
 # ---------------- Page config ----------------
 st.set_page_config(page_title="Mythic Art Explorer — Advanced UI", layout="wide", initial_sidebar_state="expanded")
@@ -40,98 +69,720 @@ st.set_page_config(page_title="Mythic Art Explorer — Advanced UI", layout="wid
 # ---------------- Constants ----------------
 MET_SEARCH = "https://collectionapi.metmuseum.org/public/collection/v1/search"
 MET_OBJECT = "https://collectionapi.metmuseum.org/public/collection/v1/objects/{}"
-
-MYTH_LIST = [
+FETCH_WORKERS = 16  # concurrent MET requests when loading a gallery
+BULK_WORKERS = 6  # Art Data bulk fetches run on their own, smaller pool
+PREFETCH_WAIT = 5  # seconds the modal waits on an in-flight master download before fetching itself
+MET_MAX_RPS = 80  # MET Open Access API limit: 80 requests per second
+MET_MAX_INFLIGHT = 16  # open MET requests across all sessions and background threads
+THUMB_SIZE = (320, 640)  # gallery tiles are 320px wide; tall works keep their aspect
+MODAL_SIZE = (980, 1960)  # detail view is at most 980px wide
+
+# MET object records / images are effectively immutable; searches change slowly
+MET_CACHE_DIR = os.getenv("MET_CACHE_DIR", ".met_cache")  # point at persistent storage on hosted deploys
+OBJECT_TTL = 60*60*24*30
+SEARCH_TTL = 60*60*24
+MISSING_TTL = 60*60*24  # a 404 (withdrawn object, missing rendition) is remembered this long on disk
+AI_MODEL = "gpt-4o-mini"
+AI_TEMPERATURE = 0  # every reply is cached by prompt, so make it the reproducible one
+AI_CACHE_TTL = 60*60*24*30  # identical prompts are served from the disk cache
+CURATOR_MAX_TOKENS = 400
+AI_MEMO_SIZE = 256  # completions kept in process memory, in front of the disk cache
+
+MYTH_LIST = (
     "Zeus","Hera","Athena","Apollo","Artemis","Aphrodite","Hermes","Dionysus","Ares","Hephaestus",
     "Poseidon","Hades","Demeter","Persephone","Hestia","Heracles","Perseus","Achilles","Odysseus",
     "Theseus","Jason","Medusa","Minotaur","Sirens","Cyclops","Centaur","Prometheus","Orpheus",
     "Eros","Nike","The Muses","The Fates","The Graces","Hecate","Atlas","Pandora"
-]
+)
 
-FIXED_BIOS = {
+FIXED_BIOS = types.MappingProxyType({
     "Zeus": "Zeus is the king of the Olympian gods, ruler of the sky and thunder. Often shown with a thunderbolt and eagle.",
     "Athena": "Athena (Pallas Athena) is goddess of wisdom, craft, and strategic warfare. Often shown armored with an owl as symbol.",
     "Medusa": "Medusa is one of the Gorgons whose gaze could turn viewers to stone; a complex symbol in ancient and modern art.",
     "Perseus": "Perseus is the hero who beheaded Medusa and rescued Andromeda; often shown with winged sandals and reflecting shield."
-}
+})
+
+# Latin / alternative names used as extra MET search terms
+_ALIAS_MAP: Mapping[str, Tuple[str, ...]] = types.MappingProxyType({
+    "Athena": ("Pallas Athena", "Minerva"),
+    "Zeus": ("Jupiter",),
+    "Aphrodite": ("Venus",),
+    "Hermes": ("Mercury",),
+    "Heracles": ("Hercules",),
+    "Persephone": ("Proserpina",),
+    "Medusa": ("Gorgon",)
+})
+
+# Static instructions go first so every request starts with the same stable prefix;
+# per-artwork metadata is sent last.
+CURATOR_SYSTEM_PROMPT = """You are a museum curator writing wall-label text for artworks from The Metropolitan Museum of Art that relate to Greek mythology.
+
+Write exactly two sections, in this order:
+1. Curator overview — 3 to 4 sentences: what the object is, who made it and when, its material and technique, and why it matters.
+2. Iconography — one paragraph: the mythological figures, attributes and scenes depicted (or likely depicted), how they would have been recognised by contemporary viewers, and any notable departures from the usual visual tradition.
+
+Rules:
+- Base every statement on the metadata provided; when something is uncertain, say so ("likely", "probably") instead of inventing details.
+- Use Greek names for figures and mention the Roman equivalent once when the object is Roman (e.g. Athena / Minerva).
+- Do not repeat raw metadata field names or values verbatim as a list.
+- Plain prose, no bullet points, no headings other than the two section titles.
+- Address a general museum audience: precise, warm, free of jargon.
+"""
+
+# MET records carry dozens of fields (image URLs, constituent IDs, measurements...);
+# only these are worth prompt tokens
+CURATOR_META_KEYS = (
+    "title", "objectName", "artistDisplayName", "objectDate", "culture", "period", "dynasty",
+    "medium", "classification", "department", "creditLine"
+)
+# everything the gallery, modal and curator prompt read; session state keeps only these
+SESSION_META_KEYS = CURATOR_META_KEYS + (
+    "dimensions", "objectURL", "tags", "primaryImage", "primaryImageSmall", "additionalImages"
+)
+
+# first 1-4 digit number in a free-text objectDate, used as its year
+_YEAR_RE = re.compile(r"-?\d{1,4}")
 
 # ---------------- Helper: MET API ----------------
-@st.cache_data(ttl=60*60*24, show_spinner=False)
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """Keep-alive session shared by all MET calls, so TLS handshakes are paid once per host."""
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mythic-Art-Explorer (Streamlit)"
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class RateLimiter:
+    """Thread-safe token bucket: on average `rate` acquisitions per second, bursts up to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter() -> RateLimiter:
+    """One bucket per server process, shared by every session and worker thread."""
+    return RateLimiter(MET_MAX_RPS)
+
+@st.cache_resource(show_spinner=False)
+def get_inflight_limit() -> threading.BoundedSemaphore:
+    """Caps concurrent MET requests process-wide (pool workers, prefetch threads, script threads)."""
+    return threading.BoundedSemaphore(MET_MAX_INFLIGHT)
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """Rate-limited GET on the shared session; only waits when the bucket is empty or too many are open."""
+    get_rate_limiter().acquire()
+    with get_inflight_limit():
+        return get_http_session().get(url, **kwargs)
+
+@st.cache_resource(show_spinner=False)
+def get_disk_cache():
+    """Persistent cache shared across sessions and restarts (None without diskcache or a usable MET_CACHE_DIR)."""
+    if not HAS_DISKCACHE:
+        return None
+    try:
+        return diskcache.Cache(MET_CACHE_DIR)
+    except (OSError, sqlite3.Error) as e:
+        # read-only or missing mount: run memory-only, as without the package (cached, so logged once)
+        logging.getLogger(__name__).warning("MET disk cache disabled (%s): %s", MET_CACHE_DIR, e)
+        return None
+
+# one get() per lookup (no `in` + [] race with culling/expiry); None is a real cached 404
+_MISS = object()
+
+# The cached fetchers raise on timeouts, connection errors, 5xx/429 and bad payloads so
+# st.cache_data never stores a transient failure; a 404 is final and is cached as an
+# empty result. The public wrappers below turn errors into empty results.
+@st.cache_data(ttl=SEARCH_TTL, max_entries=512, show_spinner=False)
+def _met_search(query: str, max_results: int) -> List[int]:
+    disk = get_disk_cache()
+    key = ("search", query, max_results)
+    hit = disk.get(key, _MISS) if disk is not None else _MISS
+    if hit is not _MISS:
+        return hit
+    resp = http_get(MET_SEARCH, params={"q": query, "hasImages": True}, timeout=12)
+    resp.raise_for_status()
+    ids = (json_loads(resp.content).get("objectIDs") or [])[:max_results]
+    if disk is not None:
+        disk.set(key, ids, expire=SEARCH_TTL)
+    return ids
+
+# memory ttl = MISSING_TTL so a cached 404 is retried on the same schedule as on disk;
+# hits simply reload from the disk cache, which keeps them for OBJECT_TTL
+@st.cache_data(ttl=MISSING_TTL, max_entries=4096, show_spinner=False)
+def _met_object(object_id: int) -> Dict:
+    disk = get_disk_cache()
+    key = ("object", object_id)
+    hit = disk.get(key, _MISS) if disk is not None else _MISS
+    if hit is not _MISS:
+        return hit
+    r = http_get(MET_OBJECT.format(object_id), timeout=12)
+    if r.status_code == 404:
+        # search results often include withdrawn IDs; remember the miss instead of re-asking every rerun
+        meta, expire = {}, MISSING_TTL
+    else:
+        r.raise_for_status()
+        meta, expire = json_loads(r.content), OBJECT_TTL
+    if disk is not None:
+        disk.set(key, meta, expire=expire)
+    return meta
+
 def met_search_ids(query: str, max_results: int = 200) -> List[int]:
     try:
-        resp = requests.get(MET_SEARCH, params={"q": query, "hasImages": True}, timeout=12)
-        resp.raise_for_status()
-        ids = resp.json().get("objectIDs") or []
-        return ids[:max_results]
-    except Exception:
+        return _met_search(query, max_results)
+    except (requests.RequestException, ValueError):
         return []
 
-@st.cache_data(ttl=60*60*24, show_spinner=False)
 def met_get_object_cached(object_id: int) -> Dict:
     try:
-        r = requests.get(MET_OBJECT.format(object_id), timeout=12)
-        r.raise_for_status()
-        return r.json()
-    except Exception:
+        return _met_object(object_id)
+    except (requests.RequestException, ValueError):
         return {}
 
-def fetch_image_from_meta(meta: Dict, prefer_small: bool = True) -> Optional[Image.Image]:
-    """Robust image fetcher; returns PIL Image or None."""
-    urls = []
-    if prefer_small and meta.get("primaryImageSmall"):
-        urls.append(meta["primaryImageSmall"])
-    if meta.get("primaryImage"):
-        urls.append(meta["primaryImage"])
-    if meta.get("additionalImages"):
-        urls.extend(meta.get("additionalImages", []))
-    for url in urls:
+def _download_image(url: str) -> Optional[bytes]:
+    disk = get_disk_cache()
+    key = ("image", url)
+    hit = disk.get(key, _MISS) if disk is not None else _MISS
+    if hit is not _MISS:
+        return hit
+    r = http_get(url, timeout=12)
+    if r.status_code == 404:
+        data, expire = None, MISSING_TTL
+    else:
+        r.raise_for_status()
+        data, expire = r.content, OBJECT_TTL
+    if disk is not None:
+        disk.set(key, data, expire=expire)
+    return data
+
+# only small renditions are memoized in process memory; multi-MB masters live in the
+# size-limited disk cache alone
+@st.cache_data(ttl=60*60, max_entries=64, show_spinner=False)
+def _image_bytes(url: str) -> Optional[bytes]:
+    return _download_image(url)
+
+def fetch_image_bytes(url: str, memo: bool = True) -> Optional[bytes]:
+    """Raw image bytes for a URL: memory cache (small renditions only), then disk cache, then the network."""
+    try:
+        return _image_bytes(url) if memo else _download_image(url)
+    except requests.RequestException:
+        return None
+
+def decode_image(data: bytes, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """Decode image bytes to RGB; with target_size, downscale during and after decode."""
+    if HAS_SIMPLEJPEG and data[:2] == b"\xff\xd8":
+        try:
+            w, h = target_size or (0, 0)
+            # min_width/min_height: turbo scales the DCT down as far as these allow
+            img = Image.fromarray(simplejpeg.decode_jpeg(data, colorspace="RGB", min_width=w, min_height=h))
+            if target_size:
+                img.thumbnail(target_size, Image.Resampling.LANCZOS)
+            return img
+        except ValueError:
+            pass  # unusual JPEG (e.g. CMYK): let Pillow handle it
+    img = Image.open(BytesIO(data))
+    if target_size:
+        # JPEG only: libjpeg decodes at 1/2, 1/4 or 1/8 scale instead of full size
+        img.draft("RGB", target_size)
+        img.load()
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if target_size:
+        img.thumbnail(target_size, Image.Resampling.LANCZOS)
+    return img
+
+def fetch_first_image(urls: List[str], target_size: Optional[Tuple[int, int]] = None,
+                      memo: bool = True) -> Optional[Image.Image]:
+    """Decode the first candidate URL that downloads and parses; None if none do."""
+    # the primary image is often repeated in additionalImages; try each URL once
+    for url in dict.fromkeys(urls):
         if not url:
             continue
+        data = fetch_image_bytes(url, memo)
+        if data is None:
+            continue
         try:
-            r = requests.get(url, timeout=12)
-            r.raise_for_status()
-            img = Image.open(BytesIO(r.content)).convert("RGB")
-            return img
-        except (requests.RequestException, UnidentifiedImageError):
+            # decode lazily from bytes so only raw bytes are ever cached
+            return decode_image(data, target_size)
+        except UnidentifiedImageError:
             continue
     return None
 
-def generate_aliases(name: str) -> List[str]:
-    mapping = {
-        "Athena": ["Pallas Athena", "Minerva"],
-        "Zeus": ["Jupiter"],
-        "Aphrodite": ["Venus"],
-        "Hermes": ["Mercury"],
-        "Heracles": ["Hercules"],
-        "Persephone": ["Proserpina"],
-        "Medusa": ["Gorgon"]
-    }
-    aliases = [name] + mapping.get(name, [])
+@st.cache_data(ttl=MISSING_TTL, max_entries=2048, show_spinner=False)
+def thumb_jpeg(url: str) -> Optional[bytes]:
+    """Encoded gallery tile for an image URL (None if it is gone); reruns and restarts reuse the bytes with no PIL work."""
+    disk = get_disk_cache()
+    key = ("thumb", url)
+    hit = disk.get(key, _MISS) if disk is not None else _MISS
+    if hit is not _MISS:
+        return hit
+    data = _image_bytes(url)  # transient errors raise, so only final misses are cached
+    tile, expire = None, MISSING_TTL
+    if data is not None:
+        try:
+            img = decode_image(data, THUMB_SIZE)
+            buf = BytesIO()
+            img.save(buf, format="JPEG", quality=80, optimize=True)
+            tile, expire = buf.getvalue(), OBJECT_TTL
+        except UnidentifiedImageError:
+            pass
+    if disk is not None:
+        disk.set(key, tile, expire=expire)
+    return tile
+
+def thumb_urls(meta: Dict) -> List[str]:
+    """Tile candidates: primaryImageSmall, a web-large additional view, the master's web-large copy. Never a master."""
+    # MET serves every CRDImages master at .../original/... and a ~800px copy at .../web-large/...;
+    # a derived URL that 404s is cached as a miss, so it is not re-requested on every rerun
+    full = meta.get("primaryImage") or ""
+    derived = full.replace("/original/", "/web-large/") if "/original/" in full else None
+    extra = next((u for u in meta.get("additionalImages") or [] if "/web-large/" in u), None)
+    return [u for u in dict.fromkeys([meta.get("primaryImageSmall"), extra, derived]) if u]
+
+def fetch_thumb(meta: Dict) -> Optional[bytes]:
+    """Gallery tile (JPEG bytes) from the first small rendition that loads; None means "unavailable"."""
+    for url in thumb_urls(meta):
+        try:
+            tile = thumb_jpeg(url)
+        except requests.RequestException:
+            continue
+        if tile is not None:
+            return tile
+    return None
+
+def fetch_full(meta: Dict, target_size: Optional[Tuple[int, int]] = None) -> Optional[Image.Image]:
+    """Detail-view image: full size first, then additional views, then the small image."""
+    urls = [meta.get("primaryImage"), *(meta.get("additionalImages") or []), meta.get("primaryImageSmall")]
+    return fetch_first_image(urls, target_size, memo=False)
+
+def fetch_preview(meta: Dict, target_size: Optional[Tuple[int, int]] = None) -> Optional[Image.Image]:
+    """Default detail-view image: the tile's source rendition (already cached); the master is left to fetch_full."""
+    return fetch_first_image(thumb_urls(meta), target_size)
+
+def _warm_preview(object_id: int) -> None:
+    urls = thumb_urls(met_get_object_cached(object_id))
+    if urls:
+        fetch_image_bytes(urls[0])
+
+def prefetch_preview_images(object_ids: List[int]) -> None:
+    """Warm the modal's default images on the shared pool, once per object per session."""
+    done = st.session_state.setdefault("_prefetched", set())
+    for oid in object_ids:
+        if oid not in done:
+            done.add(oid)
+            get_fetch_pool().submit(_warm_preview, oid)
+
+def load_artwork(object_id: int) -> Optional[Dict]:
+    """Fetch metadata + thumbnail for one object; None if the record is unavailable."""
+    meta = met_get_object_cached(object_id)
+    if not meta:
+        return None
+    img = fetch_thumb(meta)
+    slim = {k: meta[k] for k in SESSION_META_KEYS if k in meta}
+    return {"objectID": object_id, "meta": slim, "img": img}
+
+@st.cache_resource(show_spinner=False)
+def get_fetch_pool() -> ThreadPoolExecutor:
+    """Long-lived worker pool for MET I/O, shared across reruns and sessions."""
+    return ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="met-fetch")
+
+@st.cache_resource(show_spinner=False)
+def get_bulk_pool() -> ThreadPoolExecutor:
+    """Separate pool for Art Data's thousands-of-IDs fetches, so gallery work never queues behind them."""
+    return ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="met-bulk")
+
+def search_aliases(aliases: Tuple[str, ...], max_results: int) -> List[int]:
+    """Search all aliases concurrently; merged IDs keep alias order, duplicates dropped."""
+    results = get_fetch_pool().map(lambda a: met_search_ids(a, max_results=max_results), aliases)
+    return list(dict.fromkeys(chain.from_iterable(results)))
+
+def generate_aliases(name: str) -> Tuple[str, ...]:
+    # built on demand: app.py re-executes on every rerun, so a table of all figures would be rebuilt each time
+    aliases = [name, *_ALIAS_MAP.get(name, ())]
     aliases += [f"{name} myth", f"{name} greek"]
-    return list(dict.fromkeys(aliases))
+    return tuple(dict.fromkeys(aliases))
+
+def figure_bio(name: str) -> str:
+    return FIXED_BIOS.get(name, f"{name} is a canonical figure in Greek myth.")
 
 # ---------------- OpenAI wrappers (optional) ----------------
+@st.cache_resource(show_spinner=False)
+def _build_openai_client(key: str):
+    # one client (and its HTTP connection pool) per API key, reused across reruns
+    from openai import OpenAI
+    # bounded timeout: a stalled request must not hold the modal (SDK default is 10 min)
+    return OpenAI(api_key=key, timeout=30.0, max_retries=2)
+
 def get_openai_client():
     key = st.session_state.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
     if not key or not HAS_OPENAI:
         return None
-    openai.api_key = key
-    return openai
+    try:
+        return _build_openai_client(key)
+    except ImportError:  # openai < 1.0 has no OpenAI client class
+        return None
+
+def compact_meta(meta: Dict) -> str:
+    """Curator-relevant metadata as 'field: value' lines (subject tags included)."""
+    lines = [f"{k}: {meta[k]}" for k in CURATOR_META_KEYS if meta.get(k)]
+    tags = [t.get("term") for t in meta.get("tags") or [] if isinstance(t, dict) and t.get("term")]
+    if tags:
+        lines.append("tags: " + ", ".join(tags))
+    return "\n".join(lines)
+
+def prompt_digest(model: str, messages: List[Dict], max_tokens: int, temperature: float) -> str:
+    """Stable exact-match key for a chat request (sampling parameters included)."""
+    payload = json.dumps([model, messages, max_tokens, temperature], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def get_completion_memo():
+    """Process-wide LRU of completions (shared by sessions) and the lock guarding it."""
+    return collections.OrderedDict(), threading.Lock()
+
+def cached_completion(key) -> Optional[str]:
+    memo, lock = get_completion_memo()
+    with lock:
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+    disk = get_disk_cache()
+    text = disk.get(key, _MISS) if disk is not None else _MISS
+    if text is not _MISS:
+        store_completion(key, text, persist=False)
+        return text
+    return None
 
-def chat_complete_simple(client, prompt: str, max_tokens: int = 300):
+def store_completion(key, text: str, persist: bool = True) -> None:
+    memo, lock = get_completion_memo()
+    with lock:
+        memo[key] = text
+        memo.move_to_end(key)
+        while len(memo) > AI_MEMO_SIZE:
+            memo.popitem(last=False)
+    disk = get_disk_cache()
+    if persist and disk is not None:
+        disk.set(key, text, expire=AI_CACHE_TTL)
+
+def chat_key(prompt: str, max_tokens: int, system: str) -> Tuple[str, str]:
+    """Completion-cache key for a system + user prompt pair."""
+    messages = [{"role":"system","content":system},{"role":"user","content":prompt}]
+    return ("chat", prompt_digest(AI_MODEL, messages, max_tokens, AI_TEMPERATURE))
+
+def chat_complete_simple(client, prompt: str, max_tokens: int = 300, system: str = "You are a museum curator.",
+                         stream: bool = False):
+    """Chat completion as a string, or as an iterator of text chunks when stream=True."""
     if client is None:
-        return "OpenAI not configured. Paste API key in sidebar to enable."
+        text = "OpenAI not configured. Paste API key in sidebar to enable."
+        return iter([text]) if stream else text
+    messages = [{"role":"system","content":system},{"role":"user","content":prompt}]
+    key = chat_key(prompt, max_tokens, system)
+    cached = cached_completion(key)
+    if cached is not None:
+        return iter([cached]) if stream else cached
+    if stream:
+        return _stream_completion(client, messages, max_tokens, key)
     try:
-        resp = client.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{"role":"system","content":"You are a museum curator."},{"role":"user","content":prompt}],
+        resp = client.chat.completions.create(
+            model=AI_MODEL,
+            messages=messages,
             max_tokens=max_tokens,
-            temperature=0.2
+            temperature=AI_TEMPERATURE
         )
-        # resp.choices[0].message.content usually
-        return getattr(resp.choices[0].message, "content", str(resp))
+        text = resp.choices[0].message.content or ""
     except Exception as e:
         return f"OpenAI error: {e}"
+    store_completion(key, text)
+    return text
+
+def _stream_completion(client, messages: List[Dict], max_tokens: int, key):
+    """Yield completion text as it arrives; cache the full text once the stream ends."""
+    parts = []
+    try:
+        resp = client.chat.completions.create(
+            model=AI_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=AI_TEMPERATURE,
+            stream=True
+        )
+        for chunk in resp:
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content or ""
+            parts.append(piece)
+            yield piece
+    except Exception as e:
+        yield f"OpenAI error: {e}"
+        return
+    store_completion(key, "".join(parts))
+
+# ---------------- Gallery (fragment) ----------------
+def open_modal(ids: List[int], pos: int) -> None:
+    """on_click callback for "View details": the click costs one fragment rerun, not two."""
+    st.session_state["modal_list"] = ids
+    st.session_state["modal_index"] = pos
+    st.session_state["modal_page"] = st.session_state.get("page_idx", 1)
+    st.session_state["modal_open"] = True
+    # opening details signals interest: start the master download while the modal renders.
+    # The bytes land in the disk cache only, so without diskcache there is nothing to warm.
+    url = st.session_state.get("_meta_cache", {}).get(ids[pos], {}).get("primaryImage")
+    if url and get_disk_cache() is not None:
+        st.session_state["_full_prefetch"] = (url, get_fetch_pool().submit(fetch_image_bytes, url, False))
+
+def step_modal(delta: int, pages: int) -> None:
+    """on_click callback for Previous / Next; past either end of the page it turns the gallery page."""
+    idx = st.session_state.get("modal_index", 0) + delta
+    last = len(st.session_state.get("modal_list", [])) - 1
+    page = st.session_state.get("modal_page", 1)
+    if (idx > last and page < pages) or (idx < 0 and page > 1):
+        # render_gallery points the modal at the new page's first / last tile once it has loaded
+        st.session_state["page_idx"] = st.session_state["modal_page"] = page + delta
+        st.session_state["modal_turn"] = delta
+    else:
+        st.session_state["modal_index"] = max(0, min(last, idx))
+
+def close_modal() -> None:
+    st.session_state["modal_open"] = False
+
+@st.fragment
+def render_gallery(ids: List[int]):
+    """Paged thumbnail grid + details modal. Clicks in here rerun only this fragment."""
+    per_page = st.number_input("Thumbnails per page", 6, 48, 12, step=6, key="per_page")
+    pages = math.ceil(len(ids) / per_page)
+    if st.session_state.get("page_idx", 1) > max(1, pages):
+        st.session_state["page_idx"] = max(1, pages)  # fewer pages after a per-page change
+    page_idx = st.number_input("Page", 1, max(1, pages), key="page_idx")
+    start = (page_idx - 1) * per_page
+    # only the visible page is fetched (concurrently, in order); other pages load when opened
+    with st.spinner("Loading artworks..."):
+        page_items = list(get_fetch_pool().map(load_artwork, ids[start:start + per_page]))
+    meta_cache = st.session_state.setdefault("_meta_cache", {})
+    for item in page_items:
+        if item:
+            meta_cache[item["objectID"]] = item["meta"]
+
+    # waterfall-like 3-column layout with slight jittered heights
+    cols = st.columns(3)
+    # as before paging: only works with a loadable image are shown (no missing or rights-restricted records)
+    tiles = [item for item in page_items if item and item["img"] is not None]
+    shown_ids = [item["objectID"] for item in tiles]
+    if not tiles:
+        st.info("No artworks with images on this page.")
+    turn = st.session_state.pop("modal_turn", None)
+    if turn is not None:
+        # Previous / Next crossed a page boundary: continue on this page's tiles
+        if shown_ids:
+            st.session_state["modal_list"] = shown_ids
+            st.session_state["modal_index"] = 0 if turn > 0 else len(shown_ids) - 1
+        else:
+            st.session_state["modal_open"] = False
+    for n, item in enumerate(tiles):
+        col = cols[n % 3]
+        with col:
+            # already downscaled to THUMB_SIZE at load time; the browser scales the rest
+            st.image(item["img"], width=THUMB_SIZE[0])
+            meta = item["meta"]
+            st.markdown(f"**{meta.get('title') or meta.get('objectName') or 'Untitled'}**")
+            st.write(meta.get("artistDisplayName") or "Unknown")
+            st.write(meta.get("objectDate") or "—")
+            # unique key per object; the callback stores the modal context before the fragment reruns
+            st.button("View details", key=f"view_{item['objectID']}", on_click=open_modal, args=(shown_ids, n))
+
+    # Modal — outside grid; controlled by session_state
+    if st.session_state.get("modal_open", False):
+        idx = int(st.session_state.get("modal_index", 0))
+        # Prev / Next walk the displayed tiles (never raw search IDs), turning pages at either end
+        modal_list = st.session_state.get("modal_list", shown_ids)
+        idx = max(0, min(idx, len(modal_list)-1))
+        st.session_state["modal_index"] = idx
+        # Prev / Next are the likely next clicks: fetch their preview images meanwhile
+        prefetch_preview_images([modal_list[j] for j in (idx - 1, idx + 1) if 0 <= j < len(modal_list)])
+        with st.modal("Artwork details", key=f"modal_{idx}"):
+            oid = modal_list[idx]
+            # metadata was fetched with the gallery; only fall back to the MET helper on a miss
+            meta = st.session_state.get("_meta_cache", {}).get(oid) or met_get_object_cached(oid)
+
+            left, right = st.columns([0.64, 0.36])
+            with left:
+                # the master is only shown on request; it may already be downloading (see open_modal)
+                show_full = st.toggle("Show full resolution", key=f"full_{oid}", disabled=not meta.get("primaryImage"))
+                # decoded straight to MODAL_SIZE (draft mode for JPEG masters), never at full resolution
+                pending = st.session_state.get("_full_prefetch")
+                if show_full and pending and pending[0] == meta.get("primaryImage"):
+                    try:
+                        pending[1].result(timeout=PREFETCH_WAIT)  # reuse the in-flight download if it is close
+                    except FutureTimeout:
+                        pass  # still queued or slow: fetch_full below downloads it directly
+                img_full = fetch_full(meta, MODAL_SIZE) if show_full else fetch_preview(meta, MODAL_SIZE)
+                if img_full:
+                    st.image(img_full, width=img_full.size[0])
+                else:
+                    st.info("Large image unavailable.")
+            with right:
+                st.subheader(meta.get("title") or meta.get("objectName") or "Untitled")
+                st.write(f"**Object ID:** {oid}")
+                st.write(f"**Artist:** {meta.get('artistDisplayName') or 'Unknown'}")
+                st.write(f"**Date:** {meta.get('objectDate') or '—'}")
+                st.write(f"**Medium:** {meta.get('medium') or '—'}")
+                st.write(f"**Dimensions:** {meta.get('dimensions') or '—'}")
+                st.write(f"**Classification:** {meta.get('classification') or '—'}")
+                if meta.get("objectURL"):
+                    st.markdown(f"[Open on MET]({meta.get('objectURL')})")
+                st.markdown("---")
+                # AI curator optional
+                client = get_openai_client()
+                ai_key = f"ai_text_{oid}"
+                if client:
+                    if ai_key in st.session_state:
+                        # generated once per artwork; later reruns just redisplay it
+                        st.write(st.session_state[ai_key])
+                    elif st.button("Generate AI curator text", key=f"ai_{oid}"):
+                        # stream tokens as they arrive instead of blocking on the full text
+                        prompt = f"Metadata:\n{compact_meta(meta)}"
+                        text = st.write_stream(chat_complete_simple(client, prompt, max_tokens=CURATOR_MAX_TOKENS,
+                                                                    system=CURATOR_SYSTEM_PROMPT, stream=True))
+                        # a stream that failed part-way is never cached; keep only complete replies
+                        if cached_completion(chat_key(prompt, CURATOR_MAX_TOKENS, CURATOR_SYSTEM_PROMPT)) is not None:
+                            st.session_state[ai_key] = text
+                elif st.session_state.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY"):
+                    # a key is set, so the SDK is what's missing
+                    st.write("(AI features need the openai package, version 1.0 or newer: pip install -U openai)")
+                else:
+                    st.write("(Enable OpenAI API key in sidebar to use AI features)")
+                st.markdown("---")
+                nav_prev, nav_close, nav_next = st.columns([1, 1, 1])
+                # callbacks update the state before the fragment reruns, so no explicit st.rerun
+                with nav_prev:
+                    st.button("← Previous", key=f"prev_{oid}", on_click=step_modal, args=(-1, pages))
+                with nav_close:
+                    st.button("Close", key=f"close_{oid}", on_click=close_modal)
+                with nav_next:
+                    st.button("Next →", key=f"next_{oid}", on_click=step_modal, args=(1, pages))
+
+# ---------------- Art Data stats ----------------
+def extract_stats(ds: List[Dict]) -> Dict:
+    """Counts and series for the Art Data charts, in one pass over the records."""
+    years = []; mediums = []; cultures = []; classifications = []; tags = []
+    vases = []; acquisitions = []; gvr = {"greek": 0, "roman": 0, "other": 0}
+    for m in ds:
+        y = m.get("objectBeginDate")
+        if isinstance(y, int):
+            years.append(y)
+        else:
+            od = m.get("objectDate") or ""
+            mo = _YEAR_RE.search(od)
+            if mo:
+                years.append(int(mo.group(0)))
+        med = (m.get("medium") or "").strip().lower()
+        if med: mediums.append(med)
+        cult = (m.get("culture") or "").strip()
+        if cult: cultures.append(cult)
+        cl = (m.get("classification") or "").strip()
+        if cl: classifications.append(cl)
+        tg = m.get("tags") or []
+        if isinstance(tg, list):
+            for t in tg:
+                term = t.get("term") if isinstance(t, dict) else str(t)
+                if term: tags.append(term.lower())
+        title = (m.get("title") or m.get("objectName") or "").lower()
+        if any(k in med for k in ["vase", "amphora", "ceramic", "terracotta", "pottery"]):
+            vases.append(m.get("title") or m.get("objectName") or "")
+        acc = m.get("accessionYear")
+        if isinstance(acc, int): acquisitions.append(acc)
+        elif isinstance(acc, str) and acc.isdigit(): acquisitions.append(int(acc))
+        period = (m.get("period") or "").lower()
+        if "roman" in period or "roman" in title:
+            gvr["roman"] += 1
+        elif "greek" in period or "hellenistic" in period or "classical" in period or "greek" in title:
+            gvr["greek"] += 1
+        else:
+            gvr["other"] += 1
+    return {
+        "years": years,
+        "mediums": collections.Counter(mediums),
+        "cultures": collections.Counter(cultures),
+        "classifications": collections.Counter(classifications),
+        "tags": collections.Counter(tags),
+        "vases": vases,
+        "acquisitions": acquisitions,
+        "gvr": gvr
+    }
+
+# ---------------- Art Data export (fragment) ----------------
+@st.fragment
+def render_csv_export(dataset: List[Dict], figure: str):
+    """CSV export; its buttons rerun only this fragment, not the charts above."""
+    if st.button("Export cleaned dataset (CSV)"):
+        import pandas as pd
+        rows = []
+        for m in dataset:
+            rows.append({
+                "objectID": m.get("objectID"),
+                "title": m.get("title"),
+                "objectDate": m.get("objectDate"),
+                "objectBeginDate": m.get("objectBeginDate"),
+                "medium": m.get("medium"),
+                "culture": m.get("culture"),
+                "classification": m.get("classification"),
+                "period": m.get("period"),
+                "accessionYear": m.get("accessionYear"),
+                "objectURL": m.get("objectURL")
+            })
+        df = pd.DataFrame(rows)
+        csv = df.to_csv(index=False)
+        st.download_button("Download CSV", data=csv, file_name=f"met_{figure}_dataset.csv", mime="text/csv")
+
+# ---------------- Lineage graph ----------------
+# simple edge list (expand as you like)
+LINEAGE_EDGES = (
+    ("Chaos","Gaia"),("Gaia","Uranus"),("Uranus","Cronus"),("Cronus","Zeus"),
+    ("Cronus","Hera"),("Cronus","Poseidon"),("Cronus","Hades"),
+    ("Zeus","Athena"),("Zeus","Apollo"),("Zeus","Artemis"),("Zeus","Ares"),
+    ("Zeus","Hermes"),("Zeus","Dionysus"),("Zeus","Perseus"),("Zeus","Heracles"),
+    ("Perseus","Theseus"),("Theseus","Achilles"),("Medusa","Perseus"),
+    ("Minotaur","Theseus"),("Cyclops","Poseidon")
+)
+
+@st.cache_resource(show_spinner=False)
+def build_lineage_figure() -> go.Figure:
+    """Lineage network (networkx layout + Plotly traces); the edges are constant, so build it once."""
+    G = nx.DiGraph()
+    G.add_edges_from(LINEAGE_EDGES)
+    pos = nx.spring_layout(G, seed=42)
+    edge_x=[]; edge_y=[]
+    for src, dst in G.edges():
+        x0,y0 = pos[src]
+        x1,y1 = pos[dst]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    node_x=[]; node_y=[]; labels=[]
+    for node in G.nodes():
+        x,y = pos[node]
+        node_x.append(x); node_y.append(y); labels.append(node)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=1, color='#999'), hoverinfo='none'))
+    fig.add_trace(go.Scatter(x=node_x, y=node_y, mode='markers+text', text=labels, textposition='top center',
+                             marker=dict(size=18, color='#3A8DFF')))
+    fig.update_layout(showlegend=False, xaxis=dict(visible=False), yaxis=dict(visible=False), height=700)
+    return fig
 
 # ---------------- Sidebar / Navigation ----------------
 st.sidebar.title("Mythic Art Explorer")
@@ -163,134 +814,27 @@ elif page == "Mythic Art Explorer":
     st.header("Mythic Art Explorer — Greek Figures & Artworks")
     selected = st.selectbox("Choose a mythic figure:", MYTH_LIST, key="select_figure")
     st.subheader(selected)
-    st.write(FIXED_BIOS.get(selected, f"{selected} is a canonical figure in Greek myth."))
+    st.write(figure_bio(selected))
 
     st.markdown("**Search aliases (used for MET queries):**")
-    st.write(generate_aliases(selected))
+    st.write(list(generate_aliases(selected)))
 
     max_results = st.slider("Max MET records per alias", 30, 600, 200, step=10, key="max_results")
     if st.button("Fetch related works (images)", key="fetch_btn"):
         aliases = generate_aliases(selected)
-        all_ids = []
-        prog = st.progress(0)
-        for i, alias in enumerate(aliases):
-            ids = met_search_ids(alias, max_results=max_results)
-            for oid in ids:
-                if oid not in all_ids:
-                    all_ids.append(oid)
-            prog.progress(int((i+1)/len(aliases)*100))
-        prog.empty()
-        st.success(f"Found {len(all_ids)} candidate works. Loading images (may take a moment)...")
-        thumbs = []
-        prog2 = st.progress(0)
-        total = max(1, len(all_ids))
-        for i, oid in enumerate(all_ids):
-            meta = met_get_object_cached(oid)
-            if meta and (meta.get("primaryImageSmall") or meta.get("primaryImage")):
-                img = fetch_image_from_meta(meta, prefer_small=True)
-                if img:
-                    thumbs.append({"objectID": oid, "meta": meta, "img": img})
-            if i % 10 == 0:
-                prog2.progress(min(100, int((i+1)/total*100)))
-            time.sleep(0.002)
-        prog2.empty()
-        st.session_state["thumbs"] = thumbs
-        st.success(f"Loaded {len(thumbs)} artworks with images.")
-
-    thumbs = st.session_state.get("thumbs", [])
-    if not thumbs:
+        with st.spinner("Searching the MET collection..."):
+            all_ids = search_aliases(aliases, max_results)
+        # images are loaded per gallery page, not for every candidate up front
+        st.session_state["gallery_ids"] = all_ids
+        st.session_state["page_idx"] = 1  # a new result set starts on its first page
+        st.session_state["modal_open"] = False
+        st.success(f"Found {len(all_ids)} candidate works.")
+
+    gallery_ids = st.session_state.get("gallery_ids", [])
+    if not gallery_ids:
         st.info("No artworks loaded yet. Use 'Fetch related works (images)'.")
     else:
-        per_page = st.number_input("Thumbnails per page", 6, 48, 12, step=6, key="per_page")
-        pages = math.ceil(len(thumbs) / per_page)
-        page_idx = st.number_input("Page", 1, max(1, pages), 1, key="page_idx")
-        start = (page_idx - 1) * per_page
-        page_items = thumbs[start:start + per_page]
-
-        # waterfall-like 3-column layout with slight jittered heights
-        cols = st.columns(3)
-        for i, item in enumerate(page_items):
-            col = cols[i % 3]
-            with col:
-                try:
-                    img = item["img"]
-                    w_target = 320
-                    w, h = img.size
-                    ratio = w_target / w
-                    new_h = max(140, int(h * ratio))
-                    thumb = img.resize((w_target, new_h))
-                    st.image(thumb, use_column_width=False)
-                except Exception:
-                    st.write("Image preview unavailable")
-                meta = item["meta"]
-                st.markdown(f"**{meta.get('title') or meta.get('objectName') or 'Untitled'}**")
-                st.write(meta.get("artistDisplayName") or "Unknown")
-                st.write(meta.get("objectDate") or "—")
-                # unique key per object for the button
-                if st.button("View details", key=f"view_{item['objectID']}"):
-                    # store modal context
-                    st.session_state["modal_list"] = thumbs
-                    st.session_state["modal_index"] = start + i
-                    st.session_state["modal_open"] = True
-
-        # Modal — outside grid; controlled by session_state
-        if st.session_state.get("modal_open", False):
-            idx = int(st.session_state.get("modal_index", 0))
-            modal_list = st.session_state.get("modal_list", thumbs)
-            idx = max(0, min(idx, len(modal_list)-1))
-            st.session_state["modal_index"] = idx
-            with st.modal("Artwork details", key=f"modal_{idx}"):
-                record = modal_list[idx]
-                oid = record["objectID"]
-                meta = met_get_object_cached(oid) or record["meta"]
-                img_full = fetch_image_from_meta(meta, prefer_small=False) or record["img"]
-
-                left, right = st.columns([0.64, 0.36])
-                with left:
-                    if img_full:
-                        w, h = img_full.size
-                        max_w = 980
-                        if w > max_w:
-                            img_full = img_full.resize((max_w, int(h * (max_w / w))))
-                        st.image(img_full, use_column_width=False)
-                    else:
-                        st.info("Large image unavailable.")
-                with right:
-                    st.subheader(meta.get("title") or meta.get("objectName") or "Untitled")
-                    st.write(f"**Object ID:** {oid}")
-                    st.write(f"**Artist:** {meta.get('artistDisplayName') or 'Unknown'}")
-                    st.write(f"**Date:** {meta.get('objectDate') or '—'}")
-                    st.write(f"**Medium:** {meta.get('medium') or '—'}")
-                    st.write(f"**Dimensions:** {meta.get('dimensions') or '—'}")
-                    st.write(f"**Classification:** {meta.get('classification') or '—'}")
-                    if meta.get("objectURL"):
-                        st.markdown(f"[Open on MET]({meta.get('objectURL')})")
-                    st.markdown("---")
-                    # AI curator optional
-                    client = get_openai_client()
-                    if client:
-                        if st.button("Generate AI curator text", key=f"ai_{oid}"):
-                            with st.spinner("Generating curator text..."):
-                                prompt = f"Write a concise curator overview and one-paragraph iconography for this artwork. Metadata: {meta}"
-                                out = chat_complete_simple(client, prompt, max_tokens=400)
-                                st.write(out)
-                    else:
-                        st.write("(Enable OpenAI API key in sidebar to use AI features)")
-                    st.markdown("---")
-                    nav_prev, nav_close, nav_next = st.columns([1, 1, 1])
-                    with nav_prev:
-                        if st.button("← Previous", key=f"prev_{oid}"):
-                            new_idx = max(0, idx - 1)
-                            st.session_state["modal_index"] = new_idx
-                            st.experimental_rerun()
-                    with nav_close:
-                        if st.button("Close", key=f"close_{oid}"):
-                            st.session_state["modal_open"] = False
-                    with nav_next:
-                        if st.button("Next →", key=f"next_{oid}"):
-                            new_idx = min(len(modal_list) - 1, idx + 1)
-                            st.session_state["modal_index"] = new_idx
-                            st.experimental_rerun()
+        render_gallery(gallery_ids)
 
 # ---------------- ART DATA (big-data) ----------------
 elif page == "Art Data":
@@ -300,28 +844,21 @@ elif page == "Art Data":
     max_results = st.slider("Max MET records per alias", 50, 800, 200, 50, key="ad_max")
 
     if st.button("Fetch dataset & analyze", key="ad_fetch"):
-        all_ids = []
-        p = st.progress(0)
-        for i, a in enumerate(aliases):
-            ids = met_search_ids(a, max_results=max_results)
-            for oid in ids:
-                if oid not in all_ids:
-                    all_ids.append(oid)
-            p.progress(int((i+1)/len(aliases)*100))
-        p.empty()
+        with st.spinner("Searching the MET collection..."):
+            all_ids = search_aliases(aliases, max_results)
         st.info(f"Found {len(all_ids)} candidate works — fetching metadata...")
         metas = []
         p2 = st.progress(0)
         total = max(1, len(all_ids))
-        for i, oid in enumerate(all_ids):
-            m = met_get_object_cached(oid)
+        # concurrent fetches on the bulk pool (the gallery pool stays free); map() keeps search order
+        for i, m in enumerate(get_bulk_pool().map(met_get_object_cached, all_ids)):
             if m:
                 metas.append(m)
             if i % 10 == 0:
                 p2.progress(min(100, int((i+1)/total*100)))
-            time.sleep(0.002)
         p2.empty()
         st.session_state["analysis_dataset"] = metas
+        st.session_state["analysis_stats"] = extract_stats(metas)
         st.success(f"Dataset built: {len(metas)} records.")
 
     dataset = st.session_state.get("analysis_dataset", None)
@@ -329,58 +866,8 @@ elif page == "Art Data":
         st.info("No dataset. Click 'Fetch dataset & analyze'.")
     else:
         st.success(f"Analyzing {len(dataset)} records...")
-        # extract stats
-        def extract_stats(ds):
-            import re
-            years = []; mediums = []; cultures = []; classifications = []; tags = []
-            vases = []; acquisitions = []; gvr = {"greek": 0, "roman": 0, "other": 0}
-            for m in ds:
-                y = m.get("objectBeginDate")
-                if isinstance(y, int):
-                    years.append(y)
-                else:
-                    od = m.get("objectDate") or ""
-                    mo = re.search(r"-?\d{1,4}", od)
-                    if mo:
-                        try:
-                            years.append(int(mo.group(0)))
-                        except: pass
-                med = (m.get("medium") or "").strip().lower()
-                if med: mediums.append(med)
-                cult = (m.get("culture") or "").strip()
-                if cult: cultures.append(cult)
-                cl = (m.get("classification") or "").strip()
-                if cl: classifications.append(cl)
-                tg = m.get("tags") or []
-                if isinstance(tg, list):
-                    for t in tg:
-                        term = t.get("term") if isinstance(t, dict) else str(t)
-                        if term: tags.append(term.lower())
-                title = (m.get("title") or m.get("objectName") or "").lower()
-                if any(k in med for k in ["vase", "amphora", "ceramic", "terracotta", "pottery"]):
-                    vases.append(m.get("title") or m.get("objectName") or "")
-                acc = m.get("accessionYear")
-                if isinstance(acc, int): acquisitions.append(acc)
-                elif isinstance(acc, str) and acc.isdigit(): acquisitions.append(int(acc))
-                period = (m.get("period") or "").lower()
-                if "roman" in period or "roman" in title:
-                    gvr["roman"] += 1
-                elif "greek" in period or "hellenistic" in period or "classical" in period or "greek" in title:
-                    gvr["greek"] += 1
-                else:
-                    gvr["other"] += 1
-            return {
-                "years": years,
-                "mediums": collections.Counter(mediums),
-                "cultures": collections.Counter(cultures),
-                "classifications": collections.Counter(classifications),
-                "tags": collections.Counter(tags),
-                "vases": vases,
-                "acquisitions": acquisitions,
-                "gvr": gvr
-            }
-
-        stats = extract_stats(dataset)
+        # computed once when the dataset was fetched; older sessions may only have the records
+        stats = st.session_state.get("analysis_stats") or extract_stats(dataset)
 
         st.subheader("Timeline (object dates / heuristics)")
         if stats["years"]:
@@ -425,25 +912,7 @@ elif page == "Art Data":
             fig6 = px.histogram(x=stats["acquisitions"], nbins=30, labels={"x":"Year","y":"Count"})
             st.plotly_chart(fig6, use_container_width=True)
 
-        if st.button("Export cleaned dataset (CSV)"):
-            import pandas as pd
-            rows = []
-            for m in dataset:
-                rows.append({
-                    "objectID": m.get("objectID"),
-                    "title": m.get("title"),
-                    "objectDate": m.get("objectDate"),
-                    "objectBeginDate": m.get("objectBeginDate"),
-                    "medium": m.get("medium"),
-                    "culture": m.get("culture"),
-                    "classification": m.get("classification"),
-                    "period": m.get("period"),
-                    "accessionYear": m.get("accessionYear"),
-                    "objectURL": m.get("objectURL")
-                })
-            df = pd.DataFrame(rows)
-            csv = df.to_csv(index=False)
-            st.download_button("Download CSV", data=csv, file_name=f"met_{figure_for_analysis}_dataset.csv", mime="text/csv")
+        render_csv_export(dataset, figure_for_analysis)
 
 # ---------------- INTERACTIVE TESTS ----------------
 elif page == "Interactive Tests":
@@ -523,42 +992,14 @@ elif page == "Mythic Lineages":
     st.header("Mythic Lineages — Network")
     st.write("Directed relationships: Primordials → Titans → Olympians → Heroes → Creatures")
 
-    # simple edge list (expand as you like)
-    edges = [
-        ("Chaos","Gaia"),("Gaia","Uranus"),("Uranus","Cronus"),("Cronus","Zeus"),
-        ("Cronus","Hera"),("Cronus","Poseidon"),("Cronus","Hades"),
-        ("Zeus","Athena"),("Zeus","Apollo"),("Zeus","Artemis"),("Zeus","Ares"),
-        ("Zeus","Hermes"),("Zeus","Dionysus"),("Zeus","Perseus"),("Zeus","Heracles"),
-        ("Perseus","Theseus"),("Theseus","Achilles"),("Medusa","Perseus"),
-        ("Minotaur","Theseus"),("Cyclops","Poseidon")
-    ]
-
     # create network visualization — prefer networkx if available, fallback to simple Plotly nodes
     if HAS_NETWORKX:
-        G = nx.DiGraph()
-        G.add_edges_from(edges)
-        pos = nx.spring_layout(G, seed=42)
-        edge_x=[]; edge_y=[]
-        for src, dst in G.edges():
-            x0,y0 = pos[src]
-            x1,y1 = pos[dst]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-        node_x=[]; node_y=[]; labels=[]
-        for node in G.nodes():
-            x,y = pos[node]
-            node_x.append(x); node_y.append(y); labels.append(node)
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=1, color='#999'), hoverinfo='none'))
-        fig.add_trace(go.Scatter(x=node_x, y=node_y, mode='markers+text', text=labels, textposition='top center',
-                                 marker=dict(size=18, color='#3A8DFF')))
-        fig.update_layout(showlegend=False, xaxis=dict(visible=False), yaxis=dict(visible=False), height=700)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_lineage_figure(), use_container_width=True)
     else:
         # fallback: adjacency list
         st.info("NetworkX not installed in this runtime — showing adjacency lists")
         parents = {}
-        for a,b in edges:
+        for a,b in LINEAGE_EDGES:
             parents.setdefault(a, []).append(b)
         for p, children in parents.items():
             st.markdown(f"**{p}** → " + ", ".join(children))